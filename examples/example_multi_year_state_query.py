@@ -1,11 +1,13 @@
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-# To run this script, use: python examples/example_multi_year_state_query.py from the project root or python example_multi_year_state_query.py from within examples/
+# To run this script, install the package (pip install -e .) and use: python examples/example_multi_year_state_query.py
 from tts_data_client import TTSClient
 
-if __name__ == "__main__":
+
+def main():
     client = TTSClient()
     df = client.query(year=[2018, 2019], state=["CA", "AZ"])
     print(df.head())
-    print(f"Total results: {len(df)}") 
\ No newline at end of file
+    print(f"Total results: {len(df)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,11 @@ setup(
     author="Your Name",
     packages=find_packages(),
     install_requires=[
-        "s3fs",
         "pandas",
-        "pyarrow"
+        "pyarrow>=16"
     ],
-    python_requires=">=3.7",
+    extras_require={
+        "s3fs": ["s3fs"],
+    },
+    python_requires=">=3.8",
 ) 
\ No newline at end of file
@@ -1,6 +1,18 @@
-import s3fs
+import hashlib
+import json
+import logging
+import os
+import numpy as np
 import pandas as pd
-from typing import Optional, List, Union
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, reduce
+import operator
+from typing import Iterator, Optional, List, Union
 
 try:
     from tqdm import tqdm
@@ -8,25 +20,148 @@ try:
 except ImportError:
     _HAS_TQDM = False
 
+log = logging.getLogger(__name__)
+
+# Schema metadata key recording which source objects (path, size, mtime_ns) a materialized file was built from
+_SOURCES_KEY = b"tts_data_client.sources"
+
+_DEFAULT_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "tts_data_client")
+
+# Comparison operators accepted in field_filters; they apply to pandas Series and Arrow expressions alike
+_OPS = {
+    "==": operator.eq,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "!=": operator.ne,
+    "<>": operator.ne,
+}
+
+# For each operator, whether a row group with the given column statistics cannot contain a match.
+# Missing values satisfy "!=" (as they do in pandas), so it can only prune a row group without nulls.
+_PRUNE = {
+    "==": lambda stats, value: value < stats.min or value > stats.max,
+    ">": lambda stats, value: stats.max <= value,
+    ">=": lambda stats, value: stats.max < value,
+    "<": lambda stats, value: stats.min >= value,
+    "<=": lambda stats, value: stats.min > value,
+    "!=": lambda stats, value: stats.null_count == 0 and stats.min == stats.max == value,
+    "<>": lambda stats, value: stats.null_count == 0 and stats.min == stats.max == value,
+}
+
+
+def _get_op(op):
+    if op not in _OPS:
+        raise ValueError(f"Unsupported operator: {op}")
+    return _OPS[op]
+
+
 class TTSClient:
-    def __init__(self):
-        self.fs = s3fs.S3FileSystem(anon=True)
-        self.bucket = "oedi-data-lake"
+    def __init__(self, fs=None, max_workers: int = 16, local_path: Optional[str] = None, cache_dir: Optional[str] = _DEFAULT_CACHE_DIR):
+        """
+        By default the data lake is read through Arrow's native S3 client. An
+        fsspec filesystem (e.g. s3fs.S3FileSystem) may be passed in instead; with
+        an async one such as s3fs, query downloads the selected files
+        concurrently in a single batch (whole files, so best for small ones).
+        max_workers is the number of Parquet files fetched concurrently.
+
+        local_path points the client at a local mirror of the bucket (the
+        directory holding tracking-the-sun/), which is read through memory maps.
+
+        Parquet footers are persisted to index.parquet under cache_dir
+        (~/.cache/tts_data_client by default) so later runs can skip refetching
+        them; pass cache_dir=None to disable.
+        """
+        self._async_fs = None
+        if local_path is not None:
+            if fs is not None:
+                raise ValueError("Pass either fs or local_path, not both.")
+            # Memory-mapped reads let the kernel's page cache and readahead serve Parquet's many small range reads
+            fs = pafs.LocalFileSystem(use_mmap=True)
+        elif fs is None:
+            # Arrow's C++ S3 client issues ranged reads without re-entering Python (and the GIL).
+            # The one instance is shared by every read and thread so its keep-alive connections are reused.
+            fs = pafs.S3FileSystem(
+                anonymous=True,
+                region="us-west-2",
+                connect_timeout=5,
+                request_timeout=30,
+                retry_strategy=pafs.AwsStandardS3RetryStrategy(max_attempts=10),
+            )
+        elif not isinstance(fs, pafs.FileSystem):
+            # Async fsspec filesystems (e.g. s3fs) are kept so query can batch its file downloads on their event loop
+            self._async_fs = fs if getattr(fs, "async_impl", False) else None
+            fs = pafs.PyFileSystem(pafs.FSSpecHandler(fs))
+        self._fs = fs
+        self.max_workers = max_workers
+        # Listings and footers are fixed for the lifetime of a client; call refresh() to discard them
+        self._years = None
+        self._partitions = {}
+        self._footer_cache = {}
+        self._file_versions = {}
+        self._local_fs = pafs.LocalFileSystem(use_mmap=True)
+        self._mirrors = {}
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir is not None else None
+        self._load_index()
+        self.bucket = os.path.abspath(local_path) if local_path is not None else "oedi-data-lake"
         self.base_prefix = "tracking-the-sun"
 
+    @property
+    def fs(self):
+        """
+        The filesystem shared by all reads made by this client.
+        """
+        return self._fs
+
+    def refresh(self):
+        """
+        Discard cached partition listings and Parquet footers so the next call re-reads the bucket.
+        """
+        self._years = None
+        self._partitions = {}
+        self._footer_cache = {}
+        self._file_versions = {}
+
     def _list_years(self):
-        # List all available years in the S3 bucket
-        prefix = f"{self.base_prefix}/"
-        dirs = self.fs.ls(f"{self.bucket}/{prefix}", detail=True)
-        years = [d['name'].split('/')[-1] for d in dirs if d['type'] == 'directory' and d['name'].split('/')[-1].isdigit()]
-        return sorted(years)
-
-    def _list_states(self, year):
-        # List all available states for a given year
-        prefix = f"{self.base_prefix}/{year}/"
-        dirs = self.fs.ls(f"{self.bucket}/{prefix}", detail=True)
-        states = [d['name'].split('=')[-1] for d in dirs if d['type'] == 'directory' and d['name'].split('/')[-1].startswith('state=')]
-        return sorted(states)
+        # One delimited listing of the dataset root; only needed when every year is requested
+        if self._years is None:
+            infos = self.fs.get_file_info(pafs.FileSelector(f"{self.bucket}/{self.base_prefix}", allow_not_found=True))
+            self._years = sorted(int(i.base_name) for i in infos if i.type == pafs.FileType.Directory and i.base_name.isdigit())
+        return self._years
+
+    def _year_index(self, year):
+        # Map each state=XX partition of one year to its Parquet files, from a single listing bounded to that year's prefix
+        if year not in self._partitions:
+            base = f"{self.bucket}/{self.base_prefix}/{year}"
+            index = {}
+            for info in self.fs.get_file_info(pafs.FileSelector(base, allow_not_found=True, recursive=True)):
+                if info.type != pafs.FileType.File or not info.path.endswith(".parquet"):
+                    continue
+                parts = info.path[len(base) + 1:].split('/')
+                if len(parts) == 1:
+                    state = None
+                elif len(parts) == 2 and parts[0].startswith('state='):
+                    state = parts[0].split('=', 1)[1]
+                else:
+                    continue
+                index.setdefault(state, []).append(info.path)
+                # Size and modification time identify the object's current version for the on-disk footer index
+                self._file_versions[info.path] = (info.size, info.mtime_ns)
+            self._partitions[year] = index
+        return self._partitions[year]
+
+    def _iter_partitions(self, year, state):
+        # Yield (year, state, files) for every requested partition
+        years = [int(y) for y in self._normalize_param(year, self._list_years() if year == 'all' else None)]
+        # Each year is listed once per client, and uncached years are listed concurrently
+        self._map_files(self._year_index, [y for y in years if y not in self._partitions])
+        for y in years:
+            states_index = self._partitions[y]
+            all_states = sorted(s for s in states_index if s is not None)
+            states = self._normalize_param(state, all_states) if state is not None else [None]
+            for s in states:
+                yield y, s, sorted(states_index.get(s, []))
 
     def _normalize_param(self, param, all_options):
         if param == 'all':
@@ -35,140 +170,433 @@ class TTSClient:
             return list(param)
         return [param]
 
-    def query(self, year: Union[int, List[int], range, str], state: Union[str, List[str], None] = None, limit: int = 1, field_filters: Optional[dict] = None) -> pd.DataFrame:
+    def _filter_expression(self, field_filters):
+        # Translate field_filters into an Arrow expression so Parquet can skip row groups via footer statistics
+        if not field_filters:
+            return None
+        exprs = []
+        for field, (op, value) in field_filters.items():
+            fn = _get_op(op)
+            if value is None and fn in (operator.eq, operator.ne):
+                # Comparing with null yields null in Arrow, so None means "is missing" / "is not missing"
+                expr = pc.field(field).is_null() if fn is operator.eq else pc.field(field).is_valid()
+            else:
+                expr = fn(pc.field(field), pc.scalar(value))
+                if fn is operator.ne:
+                    # Keep missing values, matching pandas where NaN != value is True
+                    expr = expr | pc.field(field).is_null()
+            exprs.append(expr)
+        return reduce(operator.and_, exprs)
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.parquet")
+
+    def _load_index(self):
+        # Footers persisted by earlier runs, keyed by path
+        self._disk_index = {}
+        self._index_dirty = False
+        if self.cache_dir is None:
+            return
+        try:
+            table = pq.read_table(self._index_path())
+        except (OSError, pa.ArrowException):
+            return
+        columns = [table.column(name).to_pylist() for name in ("path", "size", "mtime_ns", "footer")]
+        for path, size, mtime_ns, footer in zip(*columns):
+            self._disk_index[path] = ((size, mtime_ns), footer)
+
+    def _save_index(self):
+        if self.cache_dir is None:
+            return
+        # Drop footers of files this client's listings no longer show, or show at a new version, so the index doesn't
+        # grow with every file ever read; paths outside the listed year prefixes (or other lakes) are kept
+        listed = tuple(f"{self.bucket}/{self.base_prefix}/{y}/" for y in self._partitions)
+        for path in [p for p in self._disk_index if p.startswith(listed)]:
+            if self._disk_index[path][0] != self._file_versions.get(path):
+                del self._disk_index[path]
+                self._index_dirty = True
+        if not self._index_dirty:
+            return
+        paths = list(self._disk_index)
+        table = pa.table({
+            "path": pa.array(paths, pa.string()),
+            "size": pa.array([self._disk_index[p][0][0] for p in paths], pa.int64()),
+            "mtime_ns": pa.array([self._disk_index[p][0][1] for p in paths], pa.int64()),
+            "footer": pa.array([self._disk_index[p][1] for p in paths], pa.binary()),
+        })
+        # Write to a temporary file first so concurrent runs never see a partial index; the cache is best effort
+        tmp_path = f"{self._index_path()}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, self._index_path())
+            self._index_dirty = False
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _read_metadata(self, path):
+        if path not in self._footer_cache:
+            version = self._file_versions.get(path)
+            entry = self._disk_index.get(path)
+            if version is not None and None not in version and entry is not None and entry[0] == version:
+                # The object hasn't changed since its footer was indexed, so no request is needed
+                metadata = pq.read_metadata(pa.BufferReader(entry[1]))
+            else:
+                if version is not None and version[0] is not None:
+                    # A fragment opened with the listed size skips the HEAD request an open by path makes,
+                    # so only the footer range is fetched
+                    fragment = ds.ParquetFileFormat().make_fragment(path, self._filesystem_for(path), file_size=version[0])
+                    metadata = fragment.metadata
+                else:
+                    metadata = pq.read_metadata(path, filesystem=self._filesystem_for(path))
+                if version is not None and None not in version:
+                    sink = pa.BufferOutputStream()
+                    metadata.write_metadata_file(sink)
+                    self._disk_index[path] = (version, sink.getvalue().to_pybytes())
+                    self._index_dirty = True
+            self._footer_cache[path] = metadata
+        return self._footer_cache[path]
+
+    def _filesystem_for(self, path):
+        # Materialized partitions live on local disk whatever filesystem the data lake is read from
+        return self._local_fs if path in self._mirrors.values() or self._is_default_mirror(path) else self.fs
+
+    def _read_footers(self, paths):
+        metadata = self._map_files(self._read_metadata, paths)
+        self._save_index()
+        return metadata
+
+    def _map_files(self, fn, paths):
+        # S3 reads are latency bound and pyarrow releases the GIL, so fan them out across a thread pool
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fn, paths))
+
+    def _select_files(self, year, state, limit):
+        paths = []
+        for y, s, files in self._iter_partitions(year, state):
+            if not files:
+                prefix = f"{self.base_prefix}/{y}" + (f"/state={s}" if s else "")
+                log.info("No Parquet files found for query: %s", prefix)
+                continue
+            mirror = self._mirror_for(y, s, files) if limit is None or limit >= len(files) else None
+            if mirror is not None:
+                log.info("Year %s, State %s: Reading materialized copy %s", y, s, mirror)
+                paths.append((mirror, y))
+                continue
+            log.info("Year %s, State %s: Found %d files. Loading up to %s...", y, s, len(files), limit)
+            paths.extend((file, y) for file in files[:limit])
+        if not paths:
+            raise FileNotFoundError("No Parquet files found for the given query parameters.")
+        return paths
+
+    def _default_mirror_path(self, year, state):
+        if self.cache_dir is None:
+            return None
+        # Clients reading different lakes (the S3 bucket, a local_path mirror) can share a cache_dir, so each gets its own copies
+        lake = f"{os.path.basename(self.bucket)}-{hashlib.sha1(self.bucket.encode()).hexdigest()[:8]}"
+        return os.path.join(self.cache_dir, "mirror", lake, self.base_prefix, str(year), f"state={state}" if state else "", "data.parquet")
+
+    def _is_default_mirror(self, path):
+        return self.cache_dir is not None and path.startswith(os.path.join(self.cache_dir, "mirror") + os.sep)
+
+    def _sources(self, files):
+        return [[f, *self._file_versions.get(f, (None, None))] for f in files]
+
+    def _mirror_for(self, year, state, files):
+        # A materialized copy is only used while it was built from exactly the files currently listed
+        path = self._mirrors.get((year, state)) or self._default_mirror_path(year, state)
+        if path is None or not os.path.exists(path):
+            return None
+        metadata = self._read_metadata(path).metadata or {}
+        if _SOURCES_KEY not in metadata or json.loads(metadata[_SOURCES_KEY]) != self._sources(files):
+            return None
+        return path
+
+    def _row_groups(self, metadata, field_filters):
+        # Use the footer's per-row-group min/max statistics to find the row groups that may contain matches
+        if not field_filters:
+            return list(range(metadata.num_row_groups))
+        columns = {metadata.schema.column(i).path: i for i in range(metadata.num_columns)}
+        row_groups = []
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for field, (op, value) in field_filters.items():
+                if field not in columns:
+                    continue
+                stats = row_group.column(columns[field]).statistics
+                if value is None or stats is None or not stats.has_min_max:
+                    continue
+                try:
+                    skip = _PRUNE[op](stats, value)
+                except TypeError:
+                    # Statistics that cannot be compared with the filter value can't rule anything out
+                    skip = False
+                if skip:
+                    break
+            else:
+                row_groups.append(i)
+        return row_groups
+
+    def _split_filters(self, field_filters, schema):
+        # Arrow can't compare every column/value pair pandas can (e.g. a timestamp column against a date string);
+        # such filters are applied after reading instead of being pushed down
+        pushdown, residual = {}, {}
+        empty = schema.empty_table()
+        for field, (op, value) in (field_filters or {}).items():
+            try:
+                empty.filter(self._filter_expression({field: (op, value)}))
+                pushdown[field] = (op, value)
+            except (pa.ArrowNotImplementedError, pa.ArrowTypeError, pa.ArrowInvalid):
+                residual[field] = (op, value)
+        return pushdown, residual
+
+    def _filter_mask(self, df, field_filters):
+        masks = []
+        for field, (op, value) in field_filters.items():
+            fn = _get_op(op)
+            if value is None and fn in (operator.eq, operator.ne):
+                # Same missing-value test as the pushed-down expression
+                mask = df[field].isna() if fn is operator.eq else df[field].notna()
+            else:
+                mask = fn(df[field], value)
+            masks.append(mask.to_numpy(dtype=bool, na_value=False))
+        # Combine all predicates into one mask so rows are selected in a single pass
+        return np.logical_and.reduce(masks)
+
+    def _finish(self, data, residual_filters=None, columns=None, value_types=None):
+        # data is a pyarrow Table or RecordBatch from the scanner; only the residual filter columns are converted to pandas
+        if residual_filters:
+            mask = self._filter_mask(data.select(list(residual_filters)).to_pandas(), residual_filters)
+            data = data.filter(pa.array(mask))
+        if columns is not None:
+            data = data.select(columns)
+        if value_types:
+            # Decode dictionary-encoded string columns now that only the matching rows are left
+            fields = [f.with_type(value_types.get(f.name, f.type)) for f in data.schema]
+            data = data.cast(pa.schema(fields, metadata=data.schema.metadata))
+        return data
+
+    def _scanner(self, files, field_filters=None, columns=None, batch_size=64_000):
+        metadata = self._read_footers([path for path, _ in files])
+        # Files from different years may carry different columns, so unify the schemas from their (cached) footers
+        schemas = [md.schema.to_arrow_schema() for md in metadata]
+        try:
+            # Columns whose type differs between files (e.g. int32 vs int64) are widened to a common type
+            schema = pa.unify_schemas(schemas + [pa.schema([("year", pa.int64())])], promote_options="permissive")
+        except (pa.ArrowTypeError, pa.ArrowInvalid) as e:
+            raise ValueError(f"The selected files have incompatible schemas: {e}") from None
+        field_filters, residual_filters = self._split_filters(field_filters, schema)
+        # String columns used in filters are read dictionary-encoded, so predicates are evaluated without
+        # materializing a Python-visible string per row; _finish decodes the rows that survive
+        value_types = {
+            field: schema.field(field).type
+            for field in field_filters
+            if field in schema.names and (pa.types.is_string(schema.field(field).type) or pa.types.is_large_string(schema.field(field).type))
+        }
+        if value_types:
+            fields = [f.with_type(pa.dictionary(pa.int32(), f.type)) if f.name in value_types else f for f in schema]
+            schema = pa.schema(fields, metadata=schema.metadata)
+        read_options = ds.ParquetReadOptions(dictionary_columns=list(value_types))
+        # Skip row groups (and whole files) that the footer statistics rule out before any data is requested
+        parquet_format = ds.ParquetFileFormat(read_options=read_options)
+        selected = []
+        for (path, y), md in zip(files, metadata):
+            row_groups = self._row_groups(md, field_filters)
+            if row_groups:
+                # Only files that are read whole anyway are worth downloading in one piece
+                read_whole = (
+                    self._async_fs is not None
+                    and columns is None
+                    and len(row_groups) == md.num_row_groups
+                    and self._filesystem_for(path) is self.fs
+                )
+                selected.append((path, y, row_groups, read_whole))
+        scan_columns = None
+        if columns is not None:
+            columns = [c for c in columns if c != 'year'] + ['year']
+            # Residual filters need their fields read even when they aren't part of the requested projection
+            scan_columns = columns + [f for f in residual_filters if f not in columns]
+        filter_expr = self._filter_expression(field_filters)
+
+        def scan(entries):
+            fragments = []
+            for source, y, row_groups in entries:
+                # The year directory becomes a 'year' column to help differentiate between years in multi-year queries
+                year_expr = ds.field("year") == pa.scalar(y, pa.int64())
+                if isinstance(source, pa.Buffer):
+                    fragments.append(parquet_format.make_fragment(source, partition_expression=year_expr, row_groups=row_groups))
+                else:
+                    # The listed size saves the scanner the HEAD request it would otherwise make before reading
+                    size = self._file_versions.get(source, (None, None))[0]
+                    fragments.append(parquet_format.make_fragment(source, self._filesystem_for(source), partition_expression=year_expr, row_groups=row_groups, file_size=size))
+            dataset = ds.FileSystemDataset(fragments, schema, parquet_format, self.fs)
+            # field_filters are also pushed down into the reader, so rows in surviving row groups are filtered before decoding
+            return dataset.scanner(
+                columns=scan_columns,
+                filter=filter_expr,
+                batch_size=batch_size,
+                fragment_readahead=self.max_workers,
+            )
+
+        if any(read_whole for _, _, _, read_whole in selected):
+            schema, batches = scan([]).projected_schema, self._download_batches(selected, scan)
+        else:
+            scanner = scan([(path, y, row_groups) for path, y, row_groups, _ in selected])
+            schema, batches = scanner.projected_schema, scanner.to_batches()
+        return schema, batches, partial(self._finish, residual_filters=residual_filters, columns=columns, value_types=value_types)
+
+    def _download_batches(self, selected, scan):
+        # Files read whole are fetched about max_workers at a time as the scan advances: one fs.cat call runs a group's
+        # GETs concurrently on the filesystem's event loop, and only that group is held in memory
+        for start in range(0, len(selected), self.max_workers):
+            group = selected[start:start + self.max_workers]
+            whole = [path for path, _, _, read_whole in group if read_whole]
+            buffers = {path: pa.py_buffer(data) for path, data in self._async_fs.cat(whole).items()} if whole else {}
+            yield from scan([(buffers.get(path, path), y, row_groups) for path, y, row_groups, _ in group]).to_batches()
+
+    def query(self, year: Union[int, List[int], range, str], state: Union[str, List[str], None] = None, limit: int = 1, field_filters: Optional[dict] = None, columns: Optional[List[str]] = None, progress: bool = False) -> pd.DataFrame:
         """
         Query the Tracking-the-Sun dataset for given year(s) and state(s).
         Accepts single values, lists, ranges, or 'all' for both year and state.
         
         Returns a pandas DataFrame with all original columns plus a 'year' column
         indicating the source year for each row (useful for multi-year queries).
+
+        field_filters maps a column name to an (operator, value) tuple, e.g.
+        {"system_size": (">", 4000)}. Filters are applied while reading the
+        Parquet files where Arrow can evaluate them; comparisons only pandas
+        understands (e.g. a date column against a date string) are applied
+        after reading. ("==", None) and ("!=", None) select rows where the
+        field is missing or present.
+
+        columns restricts the result to the given fields (the 'year' column is
+        always included). Only those column chunks are downloaded; filters are
+        evaluated before projection, so filtered fields need not be listed.
+
+        progress=True shows a tqdm progress bar (if tqdm is installed) while
+        batches are read. Status messages go to the "tts_data_client" logger.
         """
-        # Discover all years/states if needed
-        all_years = self._list_years()
-        years = self._normalize_param(year, all_years)
-        dfs = []
-        for y in years:
-            all_states = self._list_states(y)
-            states = self._normalize_param(state, all_states) if state is not None else [None]
-            for s in states:
-                prefix = f"{self.base_prefix}/{y}"
-                if s:
-                    prefix += f"/state={s}"
-                s3_path = f"{self.bucket}/{prefix}"
-                files = self.fs.glob(f"{s3_path}/*.parquet")
-                if not files:
-                    print(f"No Parquet files found for query: {prefix}")
-                    continue
-                print(f"Year {y}, State {s}: Found {len(files)} files. Loading up to {limit}...")
-                iterator = tqdm(files[:limit], desc=f"Loading files {y}-{s}") if _HAS_TQDM else files[:limit]
-                for file in iterator:
-                    if not _HAS_TQDM:
-                        print(f"Loading {file} ...")
-                    with self.fs.open(file, "rb") as f:
-                        df_temp = pd.read_parquet(f, engine="pyarrow")
-                        # Add year column to help differentiate between years in multi-year queries
-                        df_temp['year'] = y
-                        dfs.append(df_temp)
-        if not dfs:
-            raise FileNotFoundError("No Parquet files found for the given query parameters.")
-        print("Concatenating data frames...")
-        df = pd.concat(dfs, ignore_index=True)
-        if field_filters:
-            print("Applying filters...")
-            if _HAS_TQDM:
-                for field, (op, value) in tqdm(field_filters.items(), desc="Filtering"):
-                    if op == "==":
-                        df = df[df[field] == value]
-                    elif op == ">":
-                        df = df[df[field] > value]
-                    elif op == ">=":
-                        df = df[df[field] >= value]
-                    elif op == "<":
-                        df = df[df[field] < value]
-                    elif op == "<=":
-                        df = df[df[field] <= value]
-                    elif op == "!=" or op == "<>":
-                        df = df[df[field] != value]
-                    else:
-                        raise ValueError(f"Unsupported operator: {op}")
-            else:
-                for field, (op, value) in field_filters.items():
-                    print(f"Filtering {field} {op} {value}")
-                    if op == "==":
-                        df = df[df[field] == value]
-                    elif op == ">":
-                        df = df[df[field] > value]
-                    elif op == ">=":
-                        df = df[df[field] >= value]
-                    elif op == "<":
-                        df = df[df[field] < value]
-                    elif op == "<=":
-                        df = df[df[field] <= value]
-                    elif op == "!=" or op == "<>":
-                        df = df[df[field] != value]
-                    else:
-                        raise ValueError(f"Unsupported operator: {op}")
-        print("Done.")
+        paths = self._select_files(year, state, limit)
+        schema, batches, finish = self._scanner(paths, field_filters, columns)
+        for file, _ in paths:
+            log.debug("Loading %s ...", file)
+        if progress and _HAS_TQDM:
+            batches = tqdm(batches, desc="Loading batches", unit="batch")
+        table = finish(pa.Table.from_batches(batches, schema=schema))
+        # One conversion of the combined Arrow table; split_blocks + self_destruct free each column as it is converted
+        df = table.to_pandas(self_destruct=True, split_blocks=True, use_threads=True)
+        log.info("Done.")
         return df
 
+    def query_iter(self, year: Union[int, List[int], range, str], state: Union[str, List[str], None] = None, limit: int = 1, field_filters: Optional[dict] = None, columns: Optional[List[str]] = None, batch_size: int = 64_000) -> Iterator[pa.RecordBatch]:
+        """
+        Like query, but stream the matching rows as pyarrow RecordBatches of at most
+        batch_size rows, so the full result never has to be held in memory.
+        """
+        paths = self._select_files(year, state, limit)
+        _, batches, finish = self._scanner(paths, field_filters, columns, batch_size)
+        for batch in batches:
+            yield finish(batch)
+
+    def materialize(self, year: int, state: Optional[str] = None, path: Optional[str] = None) -> str:
+        """
+        Merge all Parquet files of one year/state partition into a single local
+        zstd-compressed Parquet file and return its path. Later queries that
+        would read every file of that partition read the local copy instead,
+        for as long as the source files are unchanged.
+
+        state is a single state, or None for the whole year. By default the
+        file is written under cache_dir; an explicit path is only remembered
+        by this client.
+        """
+        if state == 'all' or not (state is None or isinstance(state, str)):
+            raise ValueError(f"materialize takes a single state or None, not {state!r}")
+        year = int(year)
+        files = next(self._iter_partitions(year, state))[2]
+        if not files:
+            raise FileNotFoundError("No Parquet files found for the given query parameters.")
+        if path is None:
+            path = self._default_mirror_path(year, state)
+            if path is None:
+                raise ValueError("Pass a path, or a cache_dir to the client, to materialize into.")
+        path = os.path.abspath(path)
+        scanned_schema, scanned, _ = self._scanner([(f, year) for f in files])
+        # 'year' comes from the directory layout and is added back when the copy is read
+        names = [name for name in scanned_schema.names if name != 'year']
+        schema = scanned_schema.remove(scanned_schema.get_field_index('year'))
+        schema = schema.with_metadata({**(schema.metadata or {}), _SOURCES_KEY: json.dumps(self._sources(files)).encode()})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                # Buffer scanned batches so each row group holds up to a million rows
+                batches, buffered = [], 0
+                for batch in scanned:
+                    batches.append(batch.select(names))
+                    buffered += batch.num_rows
+                    if buffered >= 1_000_000:
+                        writer.write_table(pa.Table.from_batches(batches, schema), row_group_size=1_000_000)
+                        batches, buffered = [], 0
+                if batches:
+                    writer.write_table(pa.Table.from_batches(batches, schema), row_group_size=1_000_000)
+            os.replace(tmp_path, path)
+        except BaseException:
+            # Don't leave a partial copy behind in the cache directory
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._footer_cache.pop(path, None)
+        self._mirrors[(year, state)] = path
+        return path
+
+    def _file_metadata(self, year, state, max_files=None):
+        # Footers of the selected files; each holds both the schema and the row count
+        paths = []
+        for _, _, files in self._iter_partitions(year, state):
+            paths.extend(files[:max_files] if max_files else files)
+        return self._read_footers(paths)
+
+    def _first_file_metadata(self, year, state):
+        for _, _, files in self._iter_partitions(year, state):
+            if files:
+                return self._read_footers(files[:1])[0]
+        raise FileNotFoundError("No Parquet files found for the given query parameters.")
+
+    def _fields(self, metadata):
+        schema = metadata.schema.to_arrow_schema()
+        # Columns that pandas stored for a DataFrame index (e.g. __index_level_0__) are not fields of the data
+        index_columns = [c for c in (schema.pandas_metadata or {}).get('index_columns', []) if isinstance(c, str)]
+        # Include the year column that gets added during queries
+        return [name for name in schema.names if name not in index_columns] + ['year']
+
     def get_fields(self, year: Union[int, List[int], range, str], state: Union[str, List[str], None] = None) -> List[str]:
         """
         Return the list of fields (columns) in the dataset for the given query.
         For multiple years/states, returns the fields from the first available file.
         """
-        all_years = self._list_years()
-        years = self._normalize_param(year, all_years)
-        for y in years:
-            all_states = self._list_states(y)
-            states = self._normalize_param(state, all_states) if state is not None else [None]
-            for s in states:
-                prefix = f"{self.base_prefix}/{y}"
-                if s:
-                    prefix += f"/state={s}"
-                s3_path = f"{self.bucket}/{prefix}"
-                files = self.fs.glob(f"{s3_path}/*.parquet")
-                if files:
-                    with self.fs.open(files[0], "rb") as f:
-                        df = pd.read_parquet(f, engine="pyarrow")
-                    # Include the year column that gets added during queries
-                    fields = list(df.columns) + ['year']
-                    return fields
-        raise FileNotFoundError("No Parquet files found for the given query parameters.")
+        return self._fields(self._first_file_metadata(year, state))
 
     def count_rows(self, year: Union[int, List[int], range, str], state: Union[str, List[str], None] = None, max_files: Optional[int] = None) -> int:
         """
         Return the total number of rows for the given query. Optionally limit the number of files scanned per year/state.
+        Row counts are read from the Parquet footers, which are cached until refresh() is called.
         """
-        all_years = self._list_years()
-        years = self._normalize_param(year, all_years)
-        total_rows = 0
-        for y in years:
-            all_states = self._list_states(y)
-            states = self._normalize_param(state, all_states) if state is not None else [None]
-            for s in states:
-                prefix = f"{self.base_prefix}/{y}"
-                if s:
-                    prefix += f"/state={s}"
-                s3_path = f"{self.bucket}/{prefix}"
-                files = self.fs.glob(f"{s3_path}/*.parquet")
-                if not files:
-                    continue
-                if max_files:
-                    files = files[:max_files]
-                for file in files:
-                    with self.fs.open(file, "rb") as f:
-                        pf = pd.read_parquet(f, engine="pyarrow")
-                        total_rows += len(pf)
-        return total_rows
+        # Row counts live in the Parquet footer, so only the footer is fetched and nothing is decoded
+        return sum(md.num_rows for md in self._file_metadata(year, state, max_files))
 
     def print_summary(self, year: Union[int, List[int], range, str], state: Union[str, List[str], None] = None, max_files: Optional[int] = None):
         """
         Print a summary of the dataset for the given query: fields and row count.
+        Both come from the same footer reads, so each file is fetched at most once.
         """
         try:
-            fields = self.get_fields(year, state)
-            print(f"Fields: {fields}")
-            nrows = self.count_rows(year, state, max_files=max_files)
-            print(f"Total rows: {nrows}")
+            metadata = self._file_metadata(year, state, max_files)
+            if not metadata:
+                raise FileNotFoundError("No Parquet files found for the given query parameters.")
+            print(f"Fields: {self._fields(metadata[0])}")
+            print(f"Total rows: {sum(md.num_rows for md in metadata)}")
         except Exception as e:
-            print(f"Error: {e}") 
\ No newline at end of file
+            print(f"Error: {e}")